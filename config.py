@@ -6,10 +6,13 @@ Handles environment variables and application settings
 import os
 import sys
 from typing import Optional
-from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
+# Load environment variables from .env file. CI injects variables directly and
+# sets SKIP_DOTENV=1, so python-dotenv is only imported when there is a file.
+_DOTENV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+if os.getenv('SKIP_DOTENV') != '1' and os.path.exists(_DOTENV_PATH):
+    from dotenv import load_dotenv
+    load_dotenv(_DOTENV_PATH)
 
 def require_env_var(name: str) -> str:
     """
@@ -63,6 +66,17 @@ except ValueError:
     print(f"Invalid MAX_VOCABULARY value '{_max_vocab_raw}', falling back to 6")
     MAX_VOCABULARY = 6
 
+# Parse MAX_OUTPUT_TOKENS the same way; a truncated response is retried with twice this budget
+_max_tokens_raw = get_env_var('MAX_OUTPUT_TOKENS', None)
+try:
+    if _max_tokens_raw is None or str(_max_tokens_raw).strip() == '':
+        MAX_OUTPUT_TOKENS = 2000
+    else:
+        MAX_OUTPUT_TOKENS = int(str(_max_tokens_raw).strip())
+except ValueError:
+    print(f"Invalid MAX_OUTPUT_TOKENS value '{_max_tokens_raw}', falling back to 2000")
+    MAX_OUTPUT_TOKENS = 2000
+
 # Parse THEME_ROTATION into a cleaned list and filter out empty entries
 _themes_raw = get_env_var('THEME_ROTATION', 'work,life,tech')
 THEME_ROTATION = [t.strip() for t in str(_themes_raw).split(',') if t.strip()]
@@ -76,6 +90,11 @@ if GEMINI_MODEL is None or str(GEMINI_MODEL).strip() == '':
     GEMINI_MODEL = 'models/gemini-1.5-flash'
     print("GEMINI_MODEL was empty; defaulting to 'models/gemini-1.5-flash'")
 
+# Write generated lesson JSON into data/ after publishing
+WRITE_JSON = get_env_var('WRITE_JSON', '0') == '1'
+# Pretty-print that JSON (compact by default)
+PRETTY_JSON = get_env_var('PRETTY_JSON', '0') == '1'
+
 # Application constants
 APP_NAME = "AI Trilingual Coach"
 APP_VERSION = "1.0.0"
@@ -136,18 +155,41 @@ Keep expressions natural and commonly used in Malaysia.
 Focus on practical communication scenarios.
 """
 
+# Split the template around its two placeholders once at import so rendering
+# is plain concatenation; literal braces are unescaped here instead of by format()
+def _unescape_braces(text: str) -> str:
+    return text.replace('{{', '{').replace('}}', '}')
+
+_prompt_head, _prompt_rest = GENERATE_CONTENT_PROMPT.split('{theme}', 1)
+_prompt_mid, _prompt_tail = _prompt_rest.split('{max_vocab}', 1)
+_PROMPT_A = _unescape_braces(_prompt_head)
+_PROMPT_B = _unescape_braces(_prompt_mid)
+_PROMPT_C = _unescape_braces(_prompt_tail)
+
+def render_prompt(theme: str, max_vocab: int) -> str:
+    """
+    Render GENERATE_CONTENT_PROMPT for a theme
+
+    Args:
+        theme: Lesson theme
+        max_vocab: Number of vocabulary items to request
+
+    Returns:
+        str: Complete prompt, identical to GENERATE_CONTENT_PROMPT.format(...)
+    """
+    return f"{_PROMPT_A}{theme}{_PROMPT_B}{max_vocab}{_PROMPT_C}"
+
 def validate_config():
     """
     Validate configuration settings
     """
     print("Validating configuration...")
 
-    # Check required variables
-    required_vars = ['GEMINI_API_KEY', 'NOTION_TOKEN', 'NOTION_DATABASE_ID']
-    for var in required_vars:
-        if not globals().get(var):
-            print(f"Missing required variable: {var}")
-            return False
+    # Required variables are already enforced by require_env_var at import;
+    # this is a cheap sanity check on the bound constants
+    if not (GEMINI_API_KEY and NOTION_TOKEN and NOTION_DATABASE_ID):
+        print("Missing required variable: GEMINI_API_KEY, NOTION_TOKEN or NOTION_DATABASE_ID")
+        return False
 
     # Validate theme rotation
     if not THEME_ROTATION:
@@ -163,5 +205,6 @@ if __name__ == "__main__":
     print("\n📋 Current Configuration:")
     print(f"  Gemini Model: {GEMINI_MODEL}")
     print(f"  Max Vocabulary: {MAX_VOCABULARY}")
+    print(f"  Max Output Tokens: {MAX_OUTPUT_TOKENS}")
     print(f"  Theme Rotation: {', '.join(THEME_ROTATION)}")
     print(f"  Notion Database ID: {NOTION_DATABASE_ID[:8]}...")
\ No newline at end of file
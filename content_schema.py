@@ -0,0 +1,67 @@
+"""
+Lesson Content Schema for AI Trilingual Coach
+Shared by the content generator and the Notion page builder
+"""
+
+import fastjsonschema
+
+# Structure of a generated lesson, as requested by GENERATE_CONTENT_PROMPT.
+# Optional fields have no defaults: fastjsonschema would write them into the
+# validated dict, and that dict is cached and persisted as generated.
+_SCENARIO_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "scenario": {"type": "string"},
+        "key_phrases": {"type": "array", "items": {"type": "string"}}
+    }
+}
+
+CONTENT_SCHEMA = {
+    "type": "object",
+    "required": ["theme", "vocabulary_focus", "practice_scenarios", "quiz_toggle"],
+    "properties": {
+        "theme": {"type": "string"},
+        "vocabulary_focus": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "object",
+                "required": ["concept", "expressions"],
+                "properties": {
+                    "concept": {"type": "string"},
+                    "expressions": {
+                        "type": "object",
+                        "properties": {
+                            "en": {"type": "string"},
+                            "cn": {"type": "string"},
+                            "bm_formal": {"type": "string"},
+                            "bm_casual": {"type": "string"}
+                        }
+                    }
+                }
+            }
+        },
+        "practice_scenarios": {
+            "type": "object",
+            "properties": {
+                "work": _SCENARIO_SCHEMA,
+                "life": _SCENARIO_SCHEMA,
+                "tech": _SCENARIO_SCHEMA
+            }
+        },
+        "quiz_toggle": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["question", "answer"],
+                "properties": {
+                    "question": {"type": "string"},
+                    "answer": {"type": "string"}
+                }
+            }
+        }
+    }
+}
+
+# Compiled once at import; raises fastjsonschema.JsonSchemaException on invalid content
+validate_content = fastjsonschema.compile(CONTENT_SCHEMA)
@@ -6,25 +6,45 @@ Generates daily trilingual vocabulary lessons and publishes to Notion
 
 import sys
 import logging
+import logging.handlers
+import queue
 from datetime import datetime
 import os
 import json
 
-from config import validate_config, APP_NAME, APP_VERSION
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from config import validate_config, APP_NAME, APP_VERSION, WRITE_JSON, PRETTY_JSON
 from worker_lang import generate_content
-from notion_builder import publish_to_notion
 
-# Configure logging
+# Configure logging: records are formatted by the QueueHandler and written to
+# stdout and the log file by a background QueueListener started in run()/test_mode().
+# force=True because worker_lang/notion_builder already called basicConfig on import.
+_log_queue = queue.SimpleQueue()
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('ai_trilingual_coach.log')
-    ]
+    handlers=[logging.handlers.QueueHandler(_log_queue)],
+    force=True
+)
+_log_listener = logging.handlers.QueueListener(
+    _log_queue,
+    logging.StreamHandler(sys.stdout),
+    logging.FileHandler('ai_trilingual_coach.log')
 )
 logger = logging.getLogger(__name__)
 
+def _flush_logs() -> None:
+    """
+    Write out all queued log records before printing to stdout directly.
+    Stopping the listener drains the queue; it is restarted for later records.
+    """
+    _log_listener.stop()
+    _log_listener.start()
+
 def run() -> int:
     """
     Main execution function
@@ -32,12 +52,14 @@ def run() -> int:
     Returns:
         int: Exit code (0 for success, 1 for failure)
     """
+    _log_listener.start()
     start_time = datetime.now()
     logger.info(f"🚀 Starting {APP_NAME} v{APP_VERSION}")
 
     try:
         # Step 1: Validate configuration
         logger.info("📋 Step 1: Validating configuration...")
+        _flush_logs()
         if not validate_config():
             logger.error("❌ Configuration validation failed")
             return 1
@@ -54,6 +76,8 @@ def run() -> int:
 
         # Step 3: Publish to Notion
         logger.info("📝 Step 3: Publishing to Notion...")
+        # Imported here so --test mode never loads the Notion client
+        from notion_builder import publish_to_notion
         page_id = publish_to_notion(content_data)
 
         if not page_id:
@@ -71,17 +95,26 @@ def run() -> int:
         logger.info(f"Notion page ID: {page_id}")
         logger.info(f"Total time: {duration.total_seconds():.2f} seconds")
         # Optionally write generated JSON to repository (workflow can commit it)
-        write_json_flag = os.getenv("WRITE_JSON", "0") == "1"
+        write_json_flag = WRITE_JSON
         if "--write-json" in sys.argv:
             write_json_flag = True
 
         if write_json_flag and content_data:
             try:
                 os.makedirs("data", exist_ok=True)
-                date_str = datetime.now().strftime("%Y-%m-%d")
+                date_str = start_time.date().isoformat()
                 filename = f"data/{date_str}.json"
-                with open(filename, "w", encoding="utf-8") as fh:
-                    json.dump(content_data, fh, ensure_ascii=False, indent=2)
+                if orjson is not None:
+                    # orjson writes UTF-8 bytes directly (no ASCII escaping)
+                    option = orjson.OPT_INDENT_2 if PRETTY_JSON else 0
+                    with open(filename, "wb") as fh:
+                        fh.write(orjson.dumps(content_data, option=option))
+                else:
+                    with open(filename, "w", encoding="utf-8", buffering=1 << 16) as fh:
+                        if PRETTY_JSON:
+                            json.dump(content_data, fh, ensure_ascii=False, indent=2)
+                        else:
+                            json.dump(content_data, fh, ensure_ascii=False, separators=(",", ":"))
                 logger.info(f"Wrote generated JSON to {filename}")
             except Exception as e:
                 logger.error(f"Failed to write JSON file: {e}")
@@ -94,6 +127,8 @@ def run() -> int:
     except Exception as e:
         logger.error(f"💥 Unexpected error: {e}", exc_info=True)
         return 1
+    finally:
+        _log_listener.stop()
 
 def test_mode() -> int:
     """
@@ -103,10 +138,12 @@ def test_mode() -> int:
     Returns:
         int: Exit code
     """
+    _log_listener.start()
     logger.info("🧪 Running in test mode (no Notion publishing)")
 
     try:
         # Validate config
+        _flush_logs()
         if not validate_config():
             return 1
 
@@ -117,7 +154,8 @@ def test_mode() -> int:
             logger.error("❌ Content generation failed")
             return 1
 
-        # Display results
+        # Display results (after the queued generation logs)
+        _flush_logs()
         print("\n" + "="*50)
         print("📊 GENERATED CONTENT SUMMARY")
         print("="*50)
@@ -152,6 +190,8 @@ def test_mode() -> int:
     except Exception as e:
         logger.error(f"❌ Test failed: {e}", exc_info=True)
         return 1
+    finally:
+        _log_listener.stop()
 
 if __name__ == "__main__":
     # Check for test mode
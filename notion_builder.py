@@ -5,23 +5,128 @@ Constructs and publishes Notion pages with complex block structures
 
 import logging
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import TYPE_CHECKING, Dict, List, Any, Optional, Tuple
 
-from notion_client import Client
+import fastjsonschema
 
 from config import NOTION_TOKEN, NOTION_DATABASE_ID, NOTION_API_VERSION
+from content_schema import validate_content
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+if TYPE_CHECKING:
+    from notion_client import Client
+
+# Static page scaffolding shared across pages. Blocks are only JSON-serialized
+# into the Notion request and never mutated, so the same dicts can be reused.
+_SCENARIOS = (
+    ('work', '🏢', 'Work Scenario'),
+    ('life', '☕', 'Life Scenario'),
+    ('tech', '💻', 'Tech Scenario'),
+)
+
+class _ThemeMap(dict):
+    """Theme name to Notion select option; unknown themes map to 'Work'"""
+
+    def __missing__(self, key: str) -> str:
+        return 'Work'
+
+_THEME_MAPPING = _ThemeMap({
+    'Office Communication': 'Work',
+    'Daily Life': 'Life',
+    'Technology & Development': 'Tech'
+})
+
+_VOCAB_HEADING_BLOCK = {
+    "object": "block",
+    "type": "heading_2",
+    "heading_2": {
+        "rich_text": [{"text": {"content": "🎯 Key Vocabulary"}}]
+    }
+}
+
+_QUIZ_HEADING_BLOCK = {
+    "object": "block",
+    "type": "heading_3",
+    "heading_3": {
+        "rich_text": [{"text": {"content": "❓ Practice Quiz"}}]
+    }
+}
+
+_KEY_PHRASES_BLOCK = {
+    "object": "block",
+    "type": "paragraph",
+    "paragraph": {
+        "rich_text": [{"text": {"content": "🔑 Key Phrases:"}, "annotations": {"bold": True}}]
+    }
+}
+
+_SEPARATOR_TEXT = {"text": {"content": " | "}}
+
+# Children per pages.create / blocks.children.append request, kept under
+# Notion's limit of 100 so each request (and any retry of it) stays small
+_BLOCK_CHUNK_SIZE = 90
+
+# Shared Notion client so repeated publishes reuse one HTTP connection pool
+_client: Optional["Client"] = None
+
+def _get_client() -> "Client":
+    """
+    Get the shared Notion client, creating it on first use
+
+    Returns:
+        Client: Notion API client
+    """
+    global _client
+    if _client is None:
+        # Imported lazily: notion_client pulls in httpx and friends
+        from notion_client import Client
+        _client = Client(auth=NOTION_TOKEN, notion_version=NOTION_API_VERSION)
+        logger.info("Initialized Notion client")
+    return _client
+
+def _make_vocab_row(concept: str, expressions: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build a vocabulary overview row
+
+    Args:
+        concept: Vocabulary concept
+        expressions: Expressions keyed by language
+
+    Returns:
+        Dict: Notion paragraph block
+    """
+    en = expressions.get('en', '')
+    cn = expressions.get('cn', '')
+    bm_formal = expressions.get('bm_formal', '')
+    bm_casual = expressions.get('bm_casual', '')
+
+    return {
+        "object": "block",
+        "type": "paragraph",
+        "paragraph": {
+            "rich_text": [
+                {"text": {"content": concept}, "annotations": {"bold": True}},
+                _SEPARATOR_TEXT,
+                {"text": {"content": en}, "annotations": {"code": True}},
+                _SEPARATOR_TEXT,
+                {"text": {"content": cn}, "annotations": {"code": True}},
+                _SEPARATOR_TEXT,
+                {"text": {"content": bm_formal}, "annotations": {"code": True}},
+                _SEPARATOR_TEXT,
+                {"text": {"content": bm_casual}, "annotations": {"code": True}}
+            ]
+        }
+    }
+
 class NotionPageBuilder:
     """Builds and publishes Notion pages for trilingual lessons"""
 
     def __init__(self):
         """Initialize Notion client"""
-        self.notion = Client(auth=NOTION_TOKEN, notion_version=NOTION_API_VERSION)
-        logger.info("Initialized Notion client")
+        self.notion = _get_client()
 
     def create_page(self, content_data: Dict[str, Any]) -> Optional[str]:
         """
@@ -34,21 +139,42 @@ class NotionPageBuilder:
             Optional[str]: Page ID if successful, None if failed
         """
         try:
-            # Prepare page properties
-            page_title = self._generate_page_title(content_data)
-            properties = self._build_page_properties(content_data, page_title)
+            validate_content(content_data)
+        except fastjsonschema.JsonSchemaException as e:
+            logger.error(f"Invalid content data: {e.message}")
+            return None
+
+        try:
+            # Prepare page properties (single timestamp so title and Date agree)
+            now = datetime.now()
+            page_title = self._generate_page_title(content_data, now)
+            properties = self._build_page_properties(content_data, page_title, now)
 
             # Build page content blocks
             blocks = self._build_page_blocks(content_data)
 
-            # Create the page
+            # Create the page with the first chunk of blocks
             response = self.notion.pages.create(
                 parent={"database_id": NOTION_DATABASE_ID},
                 properties=properties,
-                children=blocks
+                children=blocks[:_BLOCK_CHUNK_SIZE]
             )
 
             page_id = response["id"]
+
+            # Append the remaining blocks in order; Notion appends in arrival
+            # order, so these requests are sent one after another
+            try:
+                for start in range(_BLOCK_CHUNK_SIZE, len(blocks), _BLOCK_CHUNK_SIZE):
+                    self.notion.blocks.children.append(
+                        block_id=page_id,
+                        children=blocks[start:start + _BLOCK_CHUNK_SIZE]
+                    )
+            except Exception:
+                # Don't leave a half-filled page in the database
+                self._archive_page(page_id)
+                raise
+
             logger.info(f"Successfully created Notion page: {page_id}")
             return page_id
 
@@ -56,44 +182,54 @@ class NotionPageBuilder:
             logger.error(f"Failed to create Notion page: {e}")
             return None
 
-    def _generate_page_title(self, content_data: Dict[str, Any]) -> str:
+    def _archive_page(self, page_id: str) -> None:
+        """
+        Archive a page whose content could not be fully written
+
+        Args:
+            page_id: Notion page ID
+        """
+        try:
+            self.notion.pages.update(page_id=page_id, archived=True)
+            logger.warning(f"Archived incomplete Notion page: {page_id}")
+        except Exception as e:
+            logger.error(f"Failed to archive incomplete Notion page {page_id}: {e}")
+
+    def _generate_page_title(self, content_data: Dict[str, Any], now: datetime) -> str:
         """
         Generate page title with date and theme
 
         Args:
             content_data: Content data
+            now: Page creation time
 
         Returns:
             str: Formatted page title
         """
-        today = datetime.now()
-        date_str = today.strftime("%Y-%m-%d")
-        theme = content_data.get('theme', 'Daily Lesson')
+        date_str = now.date().isoformat()
+        theme = content_data['theme']
 
         return f"📅 {date_str} - {theme}"
 
-    def _build_page_properties(self, content_data: Dict[str, Any], title: str) -> Dict[str, Any]:
+    def _build_page_properties(self, content_data: Dict[str, Any], title: str,
+                               now: datetime) -> Dict[str, Any]:
         """
         Build Notion page properties
 
         Args:
             content_data: Content data
             title: Page title
+            now: Page creation time
 
         Returns:
             Dict: Notion page properties
         """
-        theme = content_data.get('theme', 'Daily Lesson')
+        theme = content_data['theme']
 
         # Map theme to Notion select option
-        theme_mapping = {
-            'Office Communication': 'Work',
-            'Daily Life': 'Life',
-            'Technology & Development': 'Tech'
-        }
-        notion_theme = theme_mapping.get(theme, 'Work')
+        notion_theme = _THEME_MAPPING[theme]
 
-        vocab_count = len(content_data.get('vocabulary_focus', []))
+        vocab_count = len(content_data['vocabulary_focus'])
 
         return {
             "Title": {
@@ -103,7 +239,7 @@ class NotionPageBuilder:
                 "select": {"name": notion_theme}
             },
             "Date": {
-                "date": {"start": datetime.now().isoformat()}
+                "date": {"start": now.isoformat(timespec='seconds')}
             },
             "Vocabulary Count": {
                 "number": vocab_count
@@ -123,48 +259,43 @@ class NotionPageBuilder:
         Returns:
             List[Dict]: Notion blocks
         """
+        theme = content_data['theme']
+        vocab_items = content_data['vocabulary_focus']
+        scenarios = content_data['practice_scenarios']
+        quiz_items = content_data['quiz_toggle']
+
         blocks = []
 
         # Add theme introduction
-        blocks.extend(self._build_theme_intro(content_data))
+        blocks.extend(self._build_theme_intro(theme, len(vocab_items)))
 
         # Add vocabulary overview
-        blocks.extend(self._build_vocabulary_overview(content_data))
+        blocks.extend(self._build_vocabulary_overview(vocab_items))
 
-        # Add three scenario sections
-        scenario_order = ['work', 'life', 'tech']
-        scenario_emojis = {'work': '🏢', 'life': '☕', 'tech': '💻'}
-        scenario_titles = {
-            'work': 'Work Scenario',
-            'life': 'Life Scenario',
-            'tech': 'Tech Scenario'
-        }
+        # Lowercase each concept once; reused by every scenario section
+        vocab_index = [(vocab, vocab['concept'].lower()) for vocab in vocab_items]
 
-        for scenario in scenario_order:
+        # Add three scenario sections
+        for scenario, emoji, title in _SCENARIOS:
             blocks.extend(
                 self._build_scenario_section(
-                    content_data,
-                    scenario,
-                    scenario_emojis[scenario],
-                    scenario_titles[scenario]
+                    scenarios.get(scenario, {}), vocab_index, quiz_items, emoji, title
                 )
             )
 
         return blocks
 
-    def _build_theme_intro(self, content_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _build_theme_intro(self, theme: str, vocab_count: int) -> List[Dict[str, Any]]:
         """
         Build theme introduction section
 
         Args:
-            content_data: Content data
+            theme: Lesson theme
+            vocab_count: Number of vocabulary items
 
         Returns:
             List[Dict]: Notion blocks
         """
-        theme = content_data.get('theme', 'Daily Lesson')
-        vocab_count = len(content_data.get('vocabulary_focus', []))
-
         return [
             {
                 "object": "block",
@@ -185,61 +316,34 @@ class NotionPageBuilder:
             }
         ]
 
-    def _build_vocabulary_overview(self, content_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _build_vocabulary_overview(self, vocab_items: List[Dict]) -> List[Dict[str, Any]]:
         """
         Build vocabulary overview section
 
         Args:
-            content_data: Content data
+            vocab_items: All vocabulary items
 
         Returns:
             List[Dict]: Notion blocks
         """
-        vocab_items = content_data.get('vocabulary_focus', [])
-
-        blocks = [
-            {
-                "object": "block",
-                "type": "heading_2",
-                "heading_2": {
-                    "rich_text": [{"text": {"content": "🎯 Key Vocabulary"}}]
-                }
-            }
-        ]
+        blocks = [_VOCAB_HEADING_BLOCK]
 
         for item in vocab_items:
-            concept = item.get('concept', '')
-            expressions = item.get('expressions', {})
-
             # Add concept as bold text
-            blocks.append({
-                "object": "block",
-                "type": "paragraph",
-                "paragraph": {
-                    "rich_text": [
-                        {"text": {"content": concept}, "annotations": {"bold": True}},
-                        {"text": {"content": " | "}},
-                        {"text": {"content": expressions.get('en', '')}, "annotations": {"code": True}},
-                        {"text": {"content": " | "}},
-                        {"text": {"content": expressions.get('cn', '')}, "annotations": {"code": True}},
-                        {"text": {"content": " | "}},
-                        {"text": {"content": expressions.get('bm_formal', '')}, "annotations": {"code": True}},
-                        {"text": {"content": " | "}},
-                        {"text": {"content": expressions.get('bm_casual', '')}, "annotations": {"code": True}}
-                    ]
-                }
-            })
+            blocks.append(_make_vocab_row(item['concept'], item['expressions']))
 
         return blocks
 
-    def _build_scenario_section(self, content_data: Dict[str, Any], scenario: str,
+    def _build_scenario_section(self, scenario_data: Dict[str, Any],
+                               vocab_index: List[Tuple[Dict, str]], quiz_items: List[Dict],
                                emoji: str, title: str) -> List[Dict[str, Any]]:
         """
         Build a scenario section (Work/Life/Tech)
 
         Args:
-            content_data: Content data
-            scenario: Scenario key ('work', 'life', 'tech')
+            scenario_data: Practice scenario for this section
+            vocab_index: Vocabulary items paired with their lowercased concept
+            quiz_items: All quiz items
             emoji: Section emoji
             title: Section title
 
@@ -257,9 +361,6 @@ class NotionPageBuilder:
             }
         })
 
-        scenarios = content_data.get('practice_scenarios', {})
-        scenario_data = scenarios.get(scenario, {})
-
         # Scenario description
         scenario_desc = scenario_data.get('scenario', '')
         if scenario_desc:
@@ -274,114 +375,103 @@ class NotionPageBuilder:
         # Key phrases (formal/casual distinction)
         key_phrases = scenario_data.get('key_phrases', [])
         if key_phrases:
-            blocks.append({
-                "object": "block",
-                "type": "paragraph",
-                "paragraph": {
-                    "rich_text": [{"text": {"content": "🔑 Key Phrases:"}, "annotations": {"bold": True}}]
-                }
-            })
+            blocks.append(_KEY_PHRASES_BLOCK)
 
             # Find relevant vocabulary for this scenario
-            vocab_items = content_data.get('vocabulary_focus', [])
-            relevant_vocab = self._find_relevant_vocab(vocab_items, key_phrases)
+            relevant_vocab = self._find_relevant_vocab(vocab_index, key_phrases)
 
             for vocab in relevant_vocab:
-                expressions = vocab.get('expressions', {})
+                expressions = vocab['expressions']
+                en = expressions.get('en', '')
+                cn = expressions.get('cn', '')
+                bm_formal = expressions.get('bm_formal')
+                bm_casual = expressions.get('bm_casual')
+
+                # Translation segments shared by the formal and casual blocks
+                en_text = {"text": {"content": f" | 🇬🇧 {en}"}}
+                cn_text = {"text": {"content": f" | 🇨🇳 {cn}"}}
 
                 # Formal Malay (quote block - blue)
-                if expressions.get('bm_formal'):
+                if bm_formal:
                     blocks.append({
                         "object": "block",
                         "type": "quote",
                         "quote": {
                             "rich_text": [
-                                {"text": {"content": f"🇲🇾 Formal: {expressions['bm_formal']}"}},
-                                {"text": {"content": f" | 🇬🇧 {expressions.get('en', '')}"}},
-                                {"text": {"content": f" | 🇨🇳 {expressions.get('cn', '')}"}}
+                                {"text": {"content": f"🇲🇾 Formal: {bm_formal}"}},
+                                en_text,
+                                cn_text
                             ],
                             "color": "blue"
                         }
                     })
 
                 # Casual Malay (paragraph block - orange)
-                if expressions.get('bm_casual'):
+                if bm_casual:
                     blocks.append({
                         "object": "block",
                         "type": "paragraph",
                         "paragraph": {
                             "rich_text": [
-                                {"text": {"content": f"🇲🇾 Casual: {expressions['bm_casual']}"}},
-                                {"text": {"content": f" | 🇬🇧 {expressions.get('en', '')}"}},
-                                {"text": {"content": f" | 🇨🇳 {expressions.get('cn', '')}"}}
+                                {"text": {"content": f"🇲🇾 Casual: {bm_casual}"}},
+                                en_text,
+                                cn_text
                             ],
                             "color": "orange"
                         }
                     })
 
         # Quiz section
-        quiz_blocks = self._build_scenario_quiz(content_data, scenario)
+        quiz_blocks = self._build_scenario_quiz(quiz_items)
         blocks.extend(quiz_blocks)
 
         return blocks
 
-    def _find_relevant_vocab(self, vocab_items: List[Dict], key_phrases: List[str]) -> List[Dict]:
+    def _find_relevant_vocab(self, vocab_index: List[Tuple[Dict, str]],
+                             key_phrases: List[str]) -> List[Dict]:
         """
         Find vocabulary items relevant to scenario key phrases
 
         Args:
-            vocab_items: All vocabulary items
+            vocab_index: Vocabulary items paired with their lowercased concept
             key_phrases: Key phrases for this scenario
 
         Returns:
             List[Dict]: Relevant vocabulary items
         """
-        relevant_vocab = []
+        key_phrases_lower = [phrase.lower() for phrase in key_phrases]
 
-        for vocab in vocab_items:
-            concept = vocab.get('concept', '').lower()
-            # Simple relevance check - if concept appears in key phrases
-            for phrase in key_phrases:
-                if concept in phrase.lower() or phrase.lower() in concept:
-                    relevant_vocab.append(vocab)
-                    break
+        # Simple relevance check - if concept appears in key phrases
+        relevant_vocab = [
+            vocab for vocab, concept in vocab_index
+            if any(concept in phrase or phrase in concept for phrase in key_phrases_lower)
+        ]
 
         # If no relevant vocab found, return first few items
         if not relevant_vocab:
-            relevant_vocab = vocab_items[:3]
+            relevant_vocab = [vocab for vocab, _ in vocab_index[:3]]
 
         return relevant_vocab
 
-    def _build_scenario_quiz(self, content_data: Dict[str, Any], scenario: str) -> List[Dict[str, Any]]:
+    def _build_scenario_quiz(self, quiz_items: List[Dict]) -> List[Dict[str, Any]]:
         """
         Build quiz section for a scenario
 
         Args:
-            content_data: Content data
-            scenario: Scenario key
+            quiz_items: All quiz items
 
         Returns:
             List[Dict]: Quiz blocks
         """
-        quiz_items = content_data.get('quiz_toggle', [])
-
         if not quiz_items:
             return []
 
-        blocks = [
-            {
-                "object": "block",
-                "type": "heading_3",
-                "heading_3": {
-                    "rich_text": [{"text": {"content": "❓ Practice Quiz"}}]
-                }
-            }
-        ]
+        blocks = [_QUIZ_HEADING_BLOCK]
 
         # Add toggle blocks for quiz questions
         for i, quiz_item in enumerate(quiz_items[:3], 1):  # Limit to 3 questions per scenario
-            question = quiz_item.get('question', '')
-            answer = quiz_item.get('answer', '')
+            question = quiz_item['question']
+            answer = quiz_item['answer']
 
             blocks.append({
                 "object": "block",
@@ -7,6 +7,8 @@ Usage:
   - Locally: python scripts/backfill_copy.py 2026-01-12 2026-01-15
   - In workflow: set INPUT_START_DATE and INPUT_END_DATE env vars and run script
 """
+import os
+import shutil
 import sys
 from pathlib import Path
 from datetime import datetime, timedelta
@@ -19,8 +21,8 @@ def parse_date(s):
 def find_most_recent_file():
     if not DATA_DIR.exists():
         return None
-    files = sorted([p for p in DATA_DIR.iterdir() if p.suffix == ".json"], reverse=True)
-    return files[0] if files else None
+    candidates = (p for p in DATA_DIR.iterdir() if p.suffix == ".json")
+    return max(candidates, key=lambda p: p.name, default=None)
 
 def backfill(start_date, end_date):
     start = parse_date(start_date)
@@ -33,17 +35,22 @@ def backfill(start_date, end_date):
         print("No existing JSON files found to copy from. Aborting.")
         sys.exit(1)
 
-    content = most_recent.read_text(encoding="utf-8")
     print(f"Using source file {most_recent.name} to backfill.")
 
+    # One directory listing instead of a stat per date
+    existing = {e.name for e in os.scandir(DATA_DIR) if e.name.endswith(".json")}
+
     created = []
     for n in range((end - start).days + 1):
         d = start + timedelta(days=n)
-        target = DATA_DIR / f"{d.isoformat()}.json"
-        if target.exists():
-            print(f"{target.name} already exists; skip.")
+        name = f"{d.isoformat()}.json"
+        if name in existing:
+            print(f"{name} already exists; skip.")
             continue
-        target.write_text(content, encoding="utf-8")
+        target = DATA_DIR / name
+        # Copy bytes directly (no decode/encode). Deliberately not a hardlink:
+        # main.py rewrites data/<date>.json in place, which would clobber every link.
+        shutil.copyfile(most_recent, target)
         created.append(target.name)
         print(f"Created {target.name}")
 
@@ -58,7 +65,6 @@ if __name__ == "__main__":
         s = sys.argv[1]
         e = sys.argv[2]
     else:
-        import os
         s = os.getenv("INPUT_START_DATE", None)
         e = os.getenv("INPUT_END_DATE", None)
     if not s or not e:
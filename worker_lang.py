@@ -3,43 +3,124 @@ AI Content Generator for AI Trilingual Coach
 Generates daily trilingual vocabulary lessons using Google Gemini
 """
 
+import asyncio
+import functools
+import hashlib
 import json
 import logging
 import re
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, Optional, Any, Tuple, Union
 import os
 import time
 import pathlib
 
+import fastjsonschema
 from google import genai
 from google.genai import types
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from config import (
     GEMINI_API_KEY,
     GEMINI_MODEL,
-    GENERATE_CONTENT_PROMPT,
+    MAX_OUTPUT_TOKENS,
     MAX_VOCABULARY,
-    THEME_ROTATION
+    THEME_ROTATION,
+    render_prompt
 )
+from content_schema import validate_content
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Cleanup patterns for model JSON output. A single fence pattern covers both
+# "```json\n" openers and bare "```" closers (\w* and \n? may match nothing).
+_FENCE_RE = re.compile(r'```\w*\n?')
+_TRAILING_COMMA_RE = re.compile(r',(\s*[}\]])')
+_CTRL_RE = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+# Complete JSON string literals, and the brackets left once they are removed
+_STRING_RE = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"')
+_BRACKET_RE = re.compile(r'[{}\[\]]')
+_CLOSERS = {'{': '}', '[': ']'}
+
+# Map theme codes to descriptive names
+_THEME_MAPPING = {
+    'work': 'Office Communication',
+    'life': 'Daily Life',
+    'tech': 'Technology & Development'
+}
+
+# Markers the prompt asks the model to wrap its JSON in
+_JSON_START_MARKER = "<<<JSON_START>>>"
+_JSON_END_MARKER = "<<<JSON_END>>>"
+
+# Temperatures for the first attempt and for the concurrent retries that
+# follow it (stricter prompt); the first retry to return valid content wins
+_FIRST_TEMPERATURE = 0.7
+_RETRY_TEMPERATURES = (0.7, 0.0)
+
+# Appended to the prompt when a response could not be parsed
+_STRICT_JSON_SUFFIX = "\n\nReturn ONLY valid JSON between <<<JSON_START>>> and <<<JSON_END>>> with no extra text."
+
+# Raw responses are kept in a ring of this many files (resp_000.txt ...);
+# index.txt in the same directory records the next slot across runs
+_RAW_RESPONSE_SLOTS = 200
+
+# Generated lessons are cached on disk per (date, model, theme, prompt)
+_CONTENT_CACHE_MAX_AGE = 7 * 24 * 60 * 60  # seconds
+
+def _json_loads(text: Union[str, bytes]) -> Any:
+    """
+    Parse JSON text, using orjson when it is installed
+
+    Args:
+        text: JSON text (str or UTF-8 bytes)
+
+    Returns:
+        Any: Parsed value
+
+    Raises:
+        json.JSONDecodeError: If text is not valid JSON (orjson's error subclasses it)
+    """
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
 class AIContentGenerator:
     """AI content generator using Google Gemini"""
 
     def __init__(self):
-        """Initialize Gemini client"""
-        self.client = genai.Client(api_key=GEMINI_API_KEY)
-        logger.info(f"Initialized Gemini client with model: {GEMINI_MODEL}")
+        """Prepare local directories; the Gemini client is created on first use"""
         # prepare raw response dir
         try:
             self._raw_dir = pathlib.Path("logs/raw_responses")
             self._raw_dir.mkdir(parents=True, exist_ok=True)
+            # plain str prefix so saves skip Path construction
+            self._raw_prefix = str(self._raw_dir) + os.sep + "resp_"
+            self._raw_index_path = self._raw_dir / "index.txt"
+            self._raw_idx = self._read_raw_index()
         except Exception:
             self._raw_dir = None
+            self._raw_prefix = None
+        # prepare content cache dir and drop entries older than a week
+        try:
+            self._cache_dir = pathlib.Path("logs/content_cache")
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+            self._evict_stale_cache()
+        except Exception:
+            self._cache_dir = None
+
+    @functools.cached_property
+    def client(self) -> genai.Client:
+        """Gemini client, created on first API call"""
+        client = genai.Client(api_key=GEMINI_API_KEY)
+        logger.info(f"Initialized Gemini client with model: {GEMINI_MODEL}")
+        return client
 
     def select_daily_theme(self) -> str:
         """
@@ -50,14 +131,7 @@ class AIContentGenerator:
         theme_index = today.day % len(THEME_ROTATION)
         theme = THEME_ROTATION[theme_index].strip()
 
-        # Map theme codes to descriptive names
-        theme_mapping = {
-            'work': 'Office Communication',
-            'life': 'Daily Life',
-            'tech': 'Technology & Development'
-        }
-
-        return theme_mapping.get(theme, theme)
+        return _THEME_MAPPING.get(theme, theme)
 
     def generate_prompt(self, theme: str) -> str:
         """
@@ -69,10 +143,7 @@ class AIContentGenerator:
         Returns:
             str: Complete prompt with theme and requirements
         """
-        return GENERATE_CONTENT_PROMPT.format(
-            theme=theme,
-            max_vocab=MAX_VOCABULARY
-        )
+        return render_prompt(theme, MAX_VOCABULARY)
 
     def extract_json_from_response(self, response_text: str) -> Optional[Dict[str, Any]]:
         """
@@ -86,15 +157,18 @@ class AIContentGenerator:
             Optional[Dict]: Parsed JSON data or None if parsing failed
         """
         try:
-            # Method 1: Extract between markers
-            start_marker = "<<<JSON_START>>>"
-            end_marker = "<<<JSON_END>>>"
-
-            start_idx = response_text.find(start_marker)
-            end_idx = response_text.find(end_marker)
-
-            if start_idx != -1 and end_idx != -1:
-                json_text = response_text[start_idx + len(start_marker):end_idx].strip()
+            # Method 1: Extract between markers. The end marker is searched for
+            # only after the start marker; surrounding whitespace is left for
+            # the JSON parser, which accepts it, to avoid another copy.
+            start_idx = response_text.find(_JSON_START_MARKER)
+            end_idx = -1
+            if start_idx != -1:
+                start_idx += len(_JSON_START_MARKER)
+                end_idx = response_text.find(_JSON_END_MARKER, start_idx)
+
+            between_markers = end_idx != -1
+            if between_markers:
+                json_text = response_text[start_idx:end_idx]
             else:
                 # Method 2: Find first { and last }
                 start_idx = response_text.find('{')
@@ -106,11 +180,16 @@ class AIContentGenerator:
 
                 json_text = response_text[start_idx:end_idx + 1]
 
-            # Clean up common issues
-            json_text = self._clean_json_text(json_text)
-
-            # Parse JSON
-            data = json.loads(json_text)
+            # Parse JSON as-is first; most responses are already valid
+            try:
+                data = _json_loads(json_text)
+            except json.JSONDecodeError:
+                # Clean up common issues and retry. Brackets are only balanced
+                # between both markers: the fallback span has no end marker to
+                # show it is complete (the stream may have stopped early for a
+                # reason other than MAX_TOKENS), and closing it there could
+                # turn a cut-off lesson into a shorter valid one.
+                data = _json_loads(self._clean_json_text(json_text, balance_brackets=between_markers))
             logger.info("Successfully parsed JSON response")
             return data
 
@@ -122,81 +201,182 @@ class AIContentGenerator:
             logger.error(f"Unexpected error parsing response: {e}")
             return None
 
-    def _clean_json_text(self, json_text: str) -> str:
+    def _clean_json_text(self, json_text: str, balance_brackets: bool = True) -> str:
         """
         Clean JSON text to handle common formatting issues
 
         Args:
             json_text: Raw JSON text
+            balance_brackets: Close an unterminated string and unbalanced
+                braces/brackets left by the model
 
         Returns:
             str: Cleaned JSON text
         """
+        # Passes are kept separate on purpose: each runs in C, and a combined
+        # alternation regex or a per-char Python loop measured slower here
+
         # Remove markdown code fences
-        json_text = re.sub(r'```\w*\n?', '', json_text)
-        json_text = re.sub(r'```', '', json_text)
+        if '```' in json_text:
+            json_text = _FENCE_RE.sub('', json_text)
 
-        # Normalize quotes
-        json_text = json_text.replace('“', '"').replace('”', '"').replace('“', '"')
+        # Normalize quotes (chained replace beats str.translate here: translate
+        # drops to a slow per-char path on non-ASCII text such as the Chinese fields)
+        json_text = json_text.replace('“', '"').replace('”', '"').replace('„', '"')
         json_text = json_text.replace("’", "'").replace("‘", "'")
 
         # Remove ellipses which often break JSON ("..." or "…")
         json_text = json_text.replace("...", "").replace("…", "")
 
         # Remove trailing commas before closing braces/brackets
-        json_text = re.sub(r',(\s*[}\]])', r'\1', json_text)
+        json_text = _TRAILING_COMMA_RE.sub(r'\1', json_text)
 
         # Remove control chars
-        json_text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f]', '', json_text)
-
-        # Attempt to balance braces/brackets if truncated
-        open_braces = json_text.count('{')
-        close_braces = json_text.count('}')
-        if open_braces > close_braces:
-            json_text = json_text + ('}' * (open_braces - close_braces))
-        open_brackets = json_text.count('[')
-        close_brackets = json_text.count(']')
-        if open_brackets > close_brackets:
-            json_text = json_text + (']' * (open_brackets - close_brackets))
-
-        return json_text.strip()
+        json_text = _CTRL_RE.sub('', json_text)
+
+        json_text = json_text.strip()
+        if not balance_brackets:
+            return json_text
+
+        # Balance braces/brackets the model left open. Brackets inside strings
+        # are ignored and closers are appended innermost first.
+        structure = _STRING_RE.sub('', json_text)
+        cut = structure.find('"')
+        if cut != -1:
+            # Truncated inside a string: close it, ignore what follows the quote
+            structure = structure[:cut]
+            json_text += '"'
+        stack = []
+        for bracket in _BRACKET_RE.findall(structure):
+            if bracket in _CLOSERS:
+                stack.append(_CLOSERS[bracket])
+            elif stack and stack[-1] == bracket:
+                stack.pop()
+        if stack:
+            json_text += ''.join(reversed(stack))
+
+        return json_text
+
+    def _read_raw_index(self) -> int:
+        """Return the next raw response slot recorded by a previous run (0 if none)."""
+        try:
+            return int(self._raw_index_path.read_text().strip()) % _RAW_RESPONSE_SLOTS
+        except (OSError, ValueError):
+            return 0
 
     def _save_raw_response(self, text: str) -> Optional[str]:
         """Save raw model response for debugging. Returns path or None."""
         try:
-            if not self._raw_dir:
+            if not self._raw_prefix:
                 return None
-            ts = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
-            path = self._raw_dir / f"resp_{ts}.txt"
-            path.write_text(text, encoding="utf-8")
-            return str(path)
+            # overwrite the oldest slot so the directory stays bounded
+            slot = self._raw_idx
+            self._raw_idx = (slot + 1) % _RAW_RESPONSE_SLOTS
+            path = f"{self._raw_prefix}{slot:03d}.txt"
+            with open(path, "wb") as fh:
+                fh.write(text.encode("utf-8"))
+            self._raw_index_path.write_text(str(self._raw_idx))
+            return path
         except Exception:
             return None
 
-    def _call_model(self, prompt: str, temperature: float = 0.7, max_output_tokens: int = 4000) -> Optional[str]:
-        """Call model and return response text (or None)."""
+    def _evict_stale_cache(self) -> None:
+        """Delete cached lessons older than _CONTENT_CACHE_MAX_AGE"""
+        cutoff = time.time() - _CONTENT_CACHE_MAX_AGE
+        for path in self._cache_dir.glob("*.json"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                pass
+
+    def _cache_path(self, theme: str, prompt: str) -> Optional[pathlib.Path]:
+        """
+        Return the cache file for today's lesson, or None if caching is unavailable.
+        Keyed on the base prompt, so a lesson produced by a stricter retry prompt
+        is found by the next run too.
+        """
+        if not self._cache_dir:
+            return None
+        key_src = f"{datetime.now().date().isoformat()}|{GEMINI_MODEL}|{theme}|{prompt}"
+        key = hashlib.sha1(key_src.encode("utf-8")).hexdigest()
+        return self._cache_dir / f"{key}.json"
+
+    def _load_cached_content(self, path: Optional[pathlib.Path]) -> Optional[Dict[str, Any]]:
+        """Load a cached lesson. Returns None on miss or unreadable entry."""
+        try:
+            if not path or not path.exists():
+                return None
+            return _json_loads(path.read_bytes())
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable content cache entry {path}: {e}")
+            return None
+
+    def _store_cached_content(self, path: Optional[pathlib.Path], data: Dict[str, Any]) -> None:
+        """Write a lesson to the cache atomically (temp file + os.replace)."""
+        if not path:
+            return
+        try:
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, path)
+        except Exception as e:
+            logger.warning(f"Failed to write content cache entry {path}: {e}")
+
+    async def _call_model(self, prompt: str, temperature: float = 0.7,
+                          max_output_tokens: int = MAX_OUTPUT_TOKENS) -> Tuple[Optional[str], bool]:
+        """
+        Stream the model response and return its text (or None) and whether the
+        stream stopped at the output token limit (finish_reason MAX_TOKENS).
+        Stops reading once the JSON end marker arrives, so trailing output is not awaited.
+        """
         try:
-            resp = self.client.models.generate_content(
+            # the async stream call is a coroutine that resolves to the chunk iterator
+            stream = await self.client.aio.models.generate_content_stream(
                 model=GEMINI_MODEL,
                 contents=prompt,
                 config=types.GenerateContentConfig(temperature=temperature, max_output_tokens=max_output_tokens)
             )
-            if not resp.candidates:
-                return None
-            # concatenate parts safely
-            parts = []
-            for p in resp.candidates[0].content.parts:
-                text = getattr(p, "text", None)
-                if text is None:
-                    try:
-                        text = str(p)
-                    except Exception:
-                        text = ""
-                parts.append(text)
-            return "".join(parts)
+            pieces = []
+            tail = ""
+            truncated = False
+            try:
+                async for chunk in stream:
+                    if chunk.candidates and chunk.candidates[0].finish_reason == types.FinishReason.MAX_TOKENS:
+                        truncated = True
+                    text = self._chunk_text(chunk)
+                    if not text:
+                        continue
+                    pieces.append(text)
+                    # check across chunk boundaries: marker may be split
+                    window = tail + text
+                    if _JSON_END_MARKER in window:
+                        break
+                    tail = window[-len(_JSON_END_MARKER):]
+            finally:
+                aclose = getattr(stream, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+            return "".join(pieces) or None, truncated
         except Exception as e:
             logger.error(f"Model call error: {e}")
-            return None
+            return None, False
+
+    def _chunk_text(self, chunk: Any) -> str:
+        """Concatenate the text parts of one streamed response chunk."""
+        if not chunk.candidates or not chunk.candidates[0].content:
+            return ""
+        # concatenate parts safely
+        parts = []
+        for p in chunk.candidates[0].content.parts or ():
+            text = getattr(p, "text", None)
+            if text is None:
+                try:
+                    text = str(p)
+                except Exception:
+                    text = ""
+            parts.append(text)
+        return "".join(parts)
 
     def validate_response_data(self, data: Dict[str, Any]) -> bool:
         """
@@ -208,41 +388,53 @@ class AIContentGenerator:
         Returns:
             bool: True if data structure is valid
         """
-        required_keys = ['theme', 'vocabulary_focus', 'practice_scenarios', 'quiz_toggle']
-
-        for key in required_keys:
-            if key not in data:
-                logger.error(f"Missing required key: {key}")
-                return False
-
-        # Validate vocabulary_focus structure
-        vocab = data.get('vocabulary_focus', [])
-        if not isinstance(vocab, list) or len(vocab) == 0:
-            logger.error("vocabulary_focus must be non-empty list")
+        try:
+            validate_content(data)
+        except fastjsonschema.JsonSchemaException as e:
+            logger.error(f"Invalid response data: {e.message}")
             return False
 
-        for item in vocab:
-            if not isinstance(item, dict):
-                logger.error("vocabulary_focus items must be dictionaries")
-                return False
-            if 'concept' not in item or 'expressions' not in item:
-                logger.error("vocabulary_focus items missing required fields")
-                return False
-
-        # Validate quiz_toggle structure
-        quiz = data.get('quiz_toggle', [])
-        if not isinstance(quiz, list):
-            logger.error("quiz_toggle must be a list")
-            return False
+        return True
 
-        for item in quiz:
-            if not isinstance(item, dict) or 'question' not in item or 'answer' not in item:
-                logger.error("quiz_toggle items missing required fields")
-                return False
+    async def _attempt(self, prompt: str, temperature: float,
+                       max_output_tokens: int) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """
+        Make one model call and return the parsed content if it is valid
 
-        return True
+        Args:
+            prompt: Prompt to send
+            temperature: Sampling temperature
+            max_output_tokens: Output token budget
 
-    def generate_daily_content(self) -> Optional[Dict[str, Any]]:
+        Returns:
+            Tuple[Optional[Dict], bool]: Valid content (None if the call failed, the
+            response was truncated, or parsing or validation failed) and whether
+            the response was truncated
+        """
+        logger.info(f"Calling Gemini API (temp={temperature}, max_output_tokens={max_output_tokens})...")
+        response_text, truncated = await self._call_model(
+            prompt, temperature=temperature, max_output_tokens=max_output_tokens
+        )
+        if not response_text:
+            logger.error("No response from model")
+            return None, truncated
+        logger.info(f"Received response ({len(response_text)} chars)")
+
+        # a response cut off at the token limit is incomplete even if it parses
+        if truncated:
+            logger.warning(f"Response truncated at max_output_tokens={max_output_tokens}")
+        else:
+            data = self.extract_json_from_response(response_text)
+            if data and self.validate_response_data(data):
+                return data, False
+
+        # save raw for debugging
+        raw_path = self._save_raw_response(response_text)
+        if raw_path:
+            logger.info(f"Saved raw response to {raw_path}")
+        return None, truncated
+
+    async def generate_daily_content_async(self) -> Optional[Dict[str, Any]]:
         """
         Generate daily trilingual content
 
@@ -257,41 +449,42 @@ class AIContentGenerator:
             # Generate prompt
             prompt = self.generate_prompt(theme)
 
-            # Call Gemini API with retries and stricter fallback
-            attempts = 3
-            data = None
-            last_raw = None
-            for attempt in range(1, attempts + 1):
-                temp = 0.7 if attempt == 1 else 0.0
-                logger.info(f"Calling Gemini API (attempt {attempt}, temp={temp})...")
-                response_text = self._call_model(prompt, temperature=temp, max_output_tokens=4000)
-                if not response_text:
-                    logger.error("No response from model")
-                    continue
-                last_raw = response_text
-                logger.info(f"Received response ({len(response_text)} chars)")
-                # try parse
-                data = self.extract_json_from_response(response_text)
-                if data:
-                    break
-                # save raw for debugging
-                raw_path = self._save_raw_response(response_text)
-                if raw_path:
-                    logger.info(f"Saved raw response to {raw_path}")
-                # tweak prompt for next attempt
-                prompt = prompt + "\n\nReturn ONLY valid JSON between <<<JSON_START>>> and <<<JSON_END>>> with no extra text."
+            # Reuse today's lesson if it was already generated
+            cache_path = self._cache_path(theme, prompt)
+            cached = self._load_cached_content(cache_path)
+            if cached is not None:
+                logger.info(f"Loaded cached content from {cache_path}")
+                return cached
 
+            # Call Gemini API; on failure retry with a stricter prompt, running
+            # the retries concurrently and keeping the first valid result
+            data, truncated = await self._attempt(prompt, _FIRST_TEMPERATURE, MAX_OUTPUT_TOKENS)
             if not data:
-                logger.error("Failed to parse JSON from response")
-                if last_raw:
-                    logger.error(f"Raw response text: {last_raw[:2000]}")
-                return None
+                strict_prompt = prompt + _STRICT_JSON_SUFFIX
+                # a truncated first response gets twice the token budget on retry
+                retry_tokens = MAX_OUTPUT_TOKENS * 2 if truncated else MAX_OUTPUT_TOKENS
+                logger.info(f"Retrying with stricter prompt ({len(_RETRY_TEMPERATURES)} concurrent attempts)...")
+                tasks = [
+                    asyncio.create_task(self._attempt(strict_prompt, temp, retry_tokens))
+                    for temp in _RETRY_TEMPERATURES
+                ]
+                try:
+                    for next_done in asyncio.as_completed(tasks):
+                        data, _ = await next_done
+                        if data:
+                            break
+                finally:
+                    # cancel the slower attempt once one has succeeded
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
 
-            # Validate structure
-            if not self.validate_response_data(data):
-                logger.error("Response data validation failed")
+            if not data:
+                logger.error("Failed to generate valid content from response")
                 return None
 
+            self._store_cached_content(cache_path, data)
+
             logger.info(f"Successfully generated content with {len(data.get('vocabulary_focus', []))} vocabulary items")
             return data
 
@@ -299,6 +492,15 @@ class AIContentGenerator:
             logger.error(f"Error generating daily content: {e}")
             return None
 
+    def generate_daily_content(self) -> Optional[Dict[str, Any]]:
+        """
+        Generate daily trilingual content (synchronous wrapper)
+
+        Returns:
+            Optional[Dict]: Generated content or None if failed
+        """
+        return asyncio.run(self.generate_daily_content_async())
+
 def generate_content() -> Optional[Dict[str, Any]]:
     """
     Convenience function to generate daily content